@@ -1,15 +1,32 @@
 import sys
+import argparse
 from pathlib import Path
 from tqdm import tqdm
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 from collections import Counter, defaultdict
 import networkx as nx
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
 import time
+import heapq
 import json
+import re
+import sqlite3
+import threading
 from functools import lru_cache
 
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usamos o json da biblioteca padrão
+    orjson = None
+
+try:
+    import pyarrow  # noqa: F401 - usado pelo pandas em DataFrame.to_parquet
+except ImportError:  # pyarrow é opcional; sem ele exportamos apenas o CSV
+    pyarrow = None
+
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 from utils.credentials import read_api_key
 
@@ -18,29 +35,95 @@ BASE = "https://mathgenealogy.org:8000/api/v2/MGP"
 HEADER = {"x-access-token": API_KEY}
 
 # Configurações de otimização
-MAX_WORKERS = 10  # Número de requisições paralelas
-CACHE_FILE = "cache_brazil_data.json"
+MAX_WORKERS = 20  # Número de requisições paralelas
+CACHE_FILE = "cache_brazil_data.ndjson"
+CACHE_MAX_AGE = 24 * 60 * 60  # Idade máxima para usar o cache por padrão (segundos)
+REQUEST_TIMEOUT = (3.05, 30)  # (conexão, leitura) em segundos
+RANGE_BATCH = 500  # Maior faixa de IDs buscada em uma única requisição de range
+RANGE_MAX_GAP = 20  # Maior salto entre IDs que ainda compensa buscar na mesma faixa
+ACAD_CACHE_FILE = ".mgp_cache.sqlite"  # Cache de registros por ID
+TTL_FRESH = 24 * 60 * 60  # Até 1-2 dias (varia por ID) o registro em cache é usado diretamente
+TTL_STALE = 30 * 24 * 60 * 60  # Até 30 dias é usado, mas atualizado junto com a busca
+REFRESH_RUNS_PER_WORKER = 5  # Lotes vencidos atualizados por execução, por worker
+
+# Identifica escolas brasileiras ("Brazil" ou "Brasil") com uma única busca
+BRAZIL_SEARCH = re.compile(r"Bra[sz]il").search
+
+# Sessão compartilhada: reaproveita conexões TCP/TLS entre as requisições
+# (inclusive entre as threads do ThreadPoolExecutor) e refaz automaticamente
+# requisições que falharem por erros transitórios do servidor
+def make_adapter(max_workers=MAX_WORKERS):
+    """Cria o adaptador HTTP com pool de conexões dimensionado para os workers"""
+    return HTTPAdapter(
+        pool_connections=max_workers,
+        pool_maxsize=max_workers * 2,
+        max_retries=Retry(total=3, backoff_factor=0.3,
+                          status_forcelist=[429, 500, 502, 503, 504]),
+    )
+
+SESSION = requests.Session()
+SESSION.headers.update(HEADER)
+SESSION.mount("https://", make_adapter())
+
+# Cache por ID (SQLite): guarda cada registro com o horário em que foi buscado,
+# permitindo atualizar só os registros vencidos em vez de refazer tudo. A
+# conexão só é aberta quando a busca na API é usada (ver `acad_cache`)
+ACAD_CACHE = None
+ACAD_CACHE_LOCK = threading.Lock()
+
+def _dumps(obj):
+    """Serializa um objeto em uma única linha JSON (bytes)"""
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+def _loads(content):
+    """Desserializa JSON a partir de bytes"""
+    return orjson.loads(content) if orjson else json.loads(content)
+
+def _json(response):
+    """Valida a resposta HTTP e desserializa o corpo direto dos bytes"""
+    response.raise_for_status()
+    return _loads(response.content)
 
 def save_cache(data, filename=CACHE_FILE):
-    """Salva dados em cache"""
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """Salva dados em cache no formato NDJSON
+
+    A primeira linha guarda os metadados (IDs, timestamp e número de
+    registros); cada linha seguinte guarda um registro da API.
+    """
+    records = data['data']
+    header = {key: value for key, value in data.items() if key != 'data'}
+    header['count'] = len(records)
+    
+    with open(filename, 'wb') as f:
+        f.write(_dumps(header) + b"\n")
+        for record in records:
+            f.write(_dumps(record) + b"\n")
     print(f"   Cache salvo: {filename}")
 
 def load_cache(filename=CACHE_FILE):
-    """Carrega dados do cache"""
+    """Carrega os metadados do cache (sem os registros)"""
     try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(filename, 'rb') as f:
+            header = f.readline()
     except FileNotFoundError:
         return None
+    return _loads(header) if header else None
 
+def iter_cache(filename=CACHE_FILE):
+    """Percorre os registros do cache um a um, sem carregá-los todos na memória"""
+    with open(filename, 'rb') as f:
+        next(f, None)  # pula o cabeçalho
+        for line in f:
+            yield _loads(line)
+
+@lru_cache(maxsize=32)
 def get_mathematician_ids_by_country(country_name):
-    """Busca IDs de matemáticos formados em um país"""
+    """Busca IDs de matemáticos formados em um país (memoizado na sessão)"""
     url = f"{BASE}/search?country={country_name}"
-    response = requests.get(url, headers=HEADER)
-    response.raise_for_status()
-    ids = response.json()
+    response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    ids = _json(response)
     
     if not ids:
         return []
@@ -50,78 +133,220 @@ def get_mathematician_ids_by_country(country_name):
     else:
         return ids
 
-def get_mathematician_details(mgp_id):
-    """Busca detalhes de um matemático pelo ID"""
+def acad_cache():
+    """Retorna a conexão com o cache por ID, abrindo-a na primeira chamada
+
+    Deve ser chamada com ACAD_CACHE_LOCK adquirido.
+    """
+    global ACAD_CACHE
+    if ACAD_CACHE is None:
+        ACAD_CACHE = sqlite3.connect(ACAD_CACHE_FILE, check_same_thread=False)
+        ACAD_CACHE.execute(
+            "CREATE TABLE IF NOT EXISTS acad (id INTEGER PRIMARY KEY, fetched_at REAL, payload BLOB)"
+        )
+    return ACAD_CACHE
+
+def get_cached_mathematician(mgp_id):
+    """Consulta o cache por ID
+
+    Retorna (registro, vencido), ou (None, False) se o ID não está em cache
+    ou se o registro passou de TTL_STALE.
+    """
+    with ACAD_CACHE_LOCK:
+        row = acad_cache().execute(
+            "SELECT fetched_at, payload FROM acad WHERE id = ?", (int(mgp_id),)
+        ).fetchone()
+    
+    if row is None:
+        return None, False
+    
+    fetched_at, payload = row
+    age = time.time() - fetched_at
+    if age >= TTL_STALE:
+        return None, False
+    # A validade varia entre 1x e 2x TTL_FRESH conforme o ID, para que registros
+    # buscados na mesma execução não vençam todos ao mesmo tempo
+    fresh_ttl = TTL_FRESH * (1 + int(mgp_id) % 100 / 100)
+    return _loads(payload), age >= fresh_ttl
+
+def store_mathematicians(records):
+    """Guarda registros no cache por ID com o horário atual"""
+    now = time.time()
+    rows = [(int(record['MGP_academic']['ID']), now, _dumps(record))
+            for record in records if record and 'MGP_academic' in record]
+    with ACAD_CACHE_LOCK:
+        conn = acad_cache()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO acad VALUES (?, ?, ?)", rows)
+
+def download_mathematician_details(mgp_id):
+    """Busca detalhes de um matemático pelo ID diretamente na API"""
     url = f"{BASE}/acad?id={mgp_id}"
-    response = requests.get(url, headers=HEADER)
-    response.raise_for_status()
-    return response.json()
+    response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    record = _json(response)
+    store_mathematicians([record])
+    return record
+
+def get_mathematician_details(mgp_id, use_cached=True, stale_ids=None):
+    """Busca detalhes de um matemático pelo ID, passando pelo cache por ID
+
+    Registros em cache (mesmo vencidos) são devolvidos sem requisição; os
+    demais são buscados na API. IDs de registros vencidos são anotados em
+    `stale_ids`, para o chamador atualizá-los depois com
+    `refresh_mathematicians`. Com `use_cached=False` o registro é sempre
+    buscado na API.
+    """
+    if not use_cached:
+        return download_mathematician_details(mgp_id)
+    
+    record, stale = get_cached_mathematician(mgp_id)
+    if record is None:
+        return download_mathematician_details(mgp_id)
+    
+    if stale and stale_ids is not None:
+        stale_ids.append(mgp_id)
+    return record
+
+def refresh_mathematicians(stale_ids, max_refresh):
+    """Atualiza no cache por ID até `max_refresh` registros vencidos, um a um"""
+    for mgp_id in list(dict.fromkeys(stale_ids))[:max_refresh]:
+        try:
+            download_mathematician_details(mgp_id)
+        except Exception as e:
+            print(f"\n   Erro ao atualizar ID {mgp_id}: {e}")
 
 def get_mathematician_range(start, stop, step=1):
     """Busca matemáticos usando o endpoint de range (mais eficiente)"""
     url = f"{BASE}/acad/range?start={start}&stop={stop}&step={step}"
-    response = requests.get(url, headers=HEADER)
-    response.raise_for_status()
-    return response.json()
+    response = SESSION.get(url, timeout=REQUEST_TIMEOUT)
+    return _json(response)
 
-def fetch_mathematician_parallel(mgp_id):
-    """Função auxiliar para busca paralela"""
-    try:
-        return get_mathematician_details(mgp_id)
-    except Exception as e:
-        print(f"\n   Erro ao buscar ID {mgp_id}: {e}")
-        return None
+def split_into_runs(ids, batch=RANGE_BATCH, max_gap=RANGE_MAX_GAP):
+    """Agrupa os IDs em faixas quase contíguas de até `batch` IDs"""
+    runs = []
+    for mgp_id in sorted({int(mgp_id) for mgp_id in ids}):
+        if runs and mgp_id - runs[-1][-1] <= max_gap and mgp_id - runs[-1][0] < batch:
+            runs[-1].append(mgp_id)
+        else:
+            runs.append([mgp_id])
+    return runs
+
+def fetch_mathematician_run(run):
+    """Busca uma faixa de IDs (um ID isolado usa o endpoint individual)
+
+    Retorna um dicionário ID -> registro e guarda os registros no cache por ID.
+    """
+    found = {}
+    if len(run) > 1:
+        try:
+            wanted = {str(mgp_id) for mgp_id in run}
+            records = get_mathematician_range(run[0], run[-1] + 1)
+            records = [record for record in records
+                       if record and str(record.get('MGP_academic', {}).get('ID')) in wanted]
+            store_mathematicians(records)
+            found = {int(record['MGP_academic']['ID']): record for record in records}
+        except Exception as e:
+            print(f"\n   Aviso: falha ao buscar IDs {run[0]}-{run[-1]} pelo range ({e}); buscando um a um")
+    
+    # IDs ausentes na resposta do range (ou todos, se o range falhou) são
+    # buscados individualmente
+    for mgp_id in run:
+        if mgp_id not in found:
+            try:
+                found[mgp_id] = download_mathematician_details(mgp_id)
+            except Exception as e:
+                print(f"\n   Erro ao buscar ID {mgp_id}: {e}")
+    return found
+
+def fetch_all_mathematicians_batched(ids, batch=RANGE_BATCH, max_workers=MAX_WORKERS, use_cached=True):
+    """Busca detalhes de múltiplos matemáticos em lotes, usando o cache por ID e o endpoint de range
 
-def fetch_all_mathematicians_parallel(ids, max_workers=MAX_WORKERS):
-    """Busca detalhes de múltiplos matemáticos em paralelo"""
-    mathematicians_data = []
+    Os registros são devolvidos na mesma ordem de `ids`, incluindo IDs
+    repetidos (IDs que falharam são omitidos). Com `use_cached=False` o
+    cache por ID é ignorado e todos os IDs são buscados na API (os
+    resultados continuam sendo gravados no cache).
+    """
+    found = {}
+    stale_ids = []
+    missing_ids = []
     
+    for mgp_id in {int(mgp_id) for mgp_id in ids}:
+        record, stale = get_cached_mathematician(mgp_id) if use_cached else (None, False)
+        if record is None:
+            missing_ids.append(mgp_id)
+        else:
+            found[mgp_id] = record
+            if stale:
+                stale_ids.append(mgp_id)
+    
+    # Registros vencidos já estão em `found`; parte deles (no máximo
+    # REFRESH_RUNS_PER_WORKER lotes por worker) é atualizada no mesmo pool
+    # da busca, e o restante fica para as próximas execuções
+    stale_runs = split_into_runs(stale_ids, batch)[:max_workers * REFRESH_RUNS_PER_WORKER]
+    runs = split_into_runs(missing_ids, batch)
+    print(f"   {len(found)} registros no cache por ID ({len(stale_ids)} vencidos), "
+          f"{len(missing_ids)} a buscar em {len(runs)} lotes")
+    
+    runs += stale_runs
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_id = {executor.submit(fetch_mathematician_parallel, mgp_id): mgp_id 
-                        for mgp_id in ids}
-        
-        for future in tqdm(as_completed(future_to_id), total=len(ids), desc="   Processando"):
-            result = future.result()
-            if result:
-                mathematicians_data.append(result)
-    
-    return mathematicians_data
-
-def extract_advisor_info(academic_data):
-    """Extrai informações dos orientadores"""
-    advisors = []
-    if 'MGP_academic' in academic_data:
-        student_data = academic_data['MGP_academic'].get('student_data', {})
-        degrees = student_data.get('degrees', [])
-        for degree in degrees:
-            advised_by = degree.get('advised by', {})
-            for advisor_id, advisor_name in advised_by.items():
-                advisors.append((advisor_id, advisor_name))
-    return advisors
-
-def extract_advisees_info(academic_data):
-    """Extrai informações dos orientandos"""
-    advisees = []
-    if 'MGP_academic' in academic_data:
-        student_data = academic_data['MGP_academic'].get('student_data', {})
-        descendants = student_data.get('descendants', {})
-        advisees_dict = descendants.get('advisees', {})
-        for advisee_id, advisee_name in advisees_dict.items():
-            advisees.append((advisee_id, advisee_name))
-    return advisees
-
-def extract_school_info(academic_data):
-    """Extrai informações da escola"""
-    schools = []
-    if 'MGP_academic' in academic_data:
-        student_data = academic_data['MGP_academic'].get('student_data', {})
-        degrees = student_data.get('degrees', [])
-        for degree in degrees:
-            degree_schools = degree.get('schools', [])
-            schools.extend(degree_schools)
-    return schools
-
-def main():
+        for records in tqdm(executor.map(fetch_mathematician_run, runs), total=len(runs), desc="   Processando lotes"):
+            found.update(records)
+    
+    return [found[int(mgp_id)] for mgp_id in ids if int(mgp_id) in found]
+
+def accumulate_advisors(student_data, advisor_ids, advisor_names):
+    """Acumula os orientadores de um registro a partir do seu `student_data`
+
+    Cada orientação adiciona o ID do orientador a `advisor_ids` (uma vez por
+    grau) e o nome correspondente em `advisor_names`.
+    """
+    for degree in student_data.get('degrees', []):
+        for advisor_id, advisor_name in degree.get('advised by', {}).items():
+            advisor_ids.append(advisor_id)
+            advisor_names[advisor_id] = advisor_name
+
+def accumulate_schools(student_data, schools):
+    """Acumula as escolas de um registro a partir do seu `student_data`"""
+    for degree in student_data.get('degrees', []):
+        schools.extend(degree.get('schools', []))
+
+def positive_int(value):
+    """Tipo do argparse para inteiros maiores ou iguais a 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"valor inteiro inválido: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"deve ser pelo menos 1: {number}")
+    return number
+
+def parse_args(argv=None):
+    """Lê as opções de linha de comando"""
+    parser = argparse.ArgumentParser(
+        description="Análise do Mathematics Genealogy Project - Brasil"
+    )
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument(
+        "--use-cache", dest="use_cache", action="store_true", default=None,
+        help=f"usa o cache ({CACHE_FILE}) mesmo que tenha mais de 24h",
+    )
+    cache_group.add_argument(
+        "--no-cache", dest="use_cache", action="store_false",
+        help="ignora os caches (inclusive o cache por ID) e busca todos os dados novamente na API",
+    )
+    parser.add_argument(
+        "--workers", type=positive_int, default=MAX_WORKERS,
+        help=f"número de requisições paralelas (padrão: {MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--sequential", action="store_true",
+        help="busca os matemáticos um a um, sem paralelismo",
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    
     print("=" * 80)
     print("ANÁLISE DO MATHEMATICS GENEALOGY PROJECT - BRASIL")
     print("=" * 80)
@@ -132,21 +357,31 @@ def main():
     cached_data = load_cache()
     
     if cached_data:
-        print("\n[CACHE] Cache encontrado! Deseja usar? (s/n): ", end="")
-        use_cache = input().strip().lower()
+        cache_age = time.time() - cached_data['timestamp']
+        # Sem --use-cache/--no-cache, o cache é usado se tiver menos de 24h
+        use_cache = args.use_cache
+        if use_cache is None:
+            use_cache = cache_age < CACHE_MAX_AGE
         
-        if use_cache == 's':
+        print(f"\n[CACHE] Cache encontrado ({cache_age / 3600:.1f}h)")
+        if use_cache:
             print("   Usando dados do cache")
             brazil_ids = cached_data['ids']
-            mathematicians_data = cached_data['data']
-            print(f"   Carregados {len(brazil_ids)} IDs e {len(mathematicians_data)} registros")
+            record_count = cached_data['count']
+            # Os registros são lidos sob demanda, durante a passada de análise
+            mathematicians_data = iter_cache()
+            print(f"   Carregados {len(brazil_ids)} IDs e {record_count} registros")
             goto_analysis = True
         else:
+            print("   Cache ignorado (use --use-cache para usá-lo)")
             goto_analysis = False
     else:
         goto_analysis = False
     
     if not goto_analysis:
+        # --no-cache também ignora o cache por ID
+        use_cached = args.use_cache is not False
+        
         # 1. Buscar todos os matemáticos formados no Brasil
         print("\n[1/6] Buscando IDs de matemáticos formados no Brasil...")
         brazil_ids = get_mathematician_ids_by_country("Brazil")
@@ -154,24 +389,31 @@ def main():
         
         # 2. Buscar detalhes de cada matemático
         print("\n[2/6] Buscando detalhes de cada matemático...")
-        print("   Escolha o método:")
-        print("   1. Paralelo (rápido, múltiplas requisições simultâneas)")
-        print("   2. Sequencial (lento, mas seguro)")
-        
-        choice = input("   Opção (1/2) [padrão=1]: ").strip() or "1"
         
-        if choice == "1":
-            print(f"   Usando método PARALELO com {MAX_WORKERS} workers")
-            mathematicians_data = fetch_all_mathematicians_parallel(brazil_ids, MAX_WORKERS)
+        if not args.sequential:
+            print(f"   Usando método PARALELO com {args.workers} workers")
+            if args.workers > MAX_WORKERS:
+                SESSION.mount("https://", make_adapter(args.workers))
+            mathematicians_data = fetch_all_mathematicians_batched(brazil_ids, RANGE_BATCH, args.workers, use_cached)
         else:
             print("   Usando método SEQUENCIAL")
             mathematicians_data = []
+            stale_ids = []
             for mgp_id in tqdm(brazil_ids, desc="   Processando"):
                 try:
-                    data = get_mathematician_details(mgp_id)
+                    data = get_mathematician_details(mgp_id, use_cached, stale_ids)
                     mathematicians_data.append(data)
                 except Exception as e:
                     print(f"\n   Erro ao buscar ID {mgp_id}: {e}")
+            
+            # Registros vencidos foram usados do cache; com um único worker,
+            # só REFRESH_RUNS_PER_WORKER deles são atualizados por execução
+            if stale_ids:
+                print(f"   {len(set(stale_ids))} registros vencidos no cache por ID, "
+                      f"atualizando até {REFRESH_RUNS_PER_WORKER}")
+                refresh_mathematicians(stale_ids, REFRESH_RUNS_PER_WORKER)
+        
+        record_count = len(mathematicians_data)
         
         print("\n   Salvando cache para uso futuro...")
         save_cache({
@@ -182,56 +424,74 @@ def main():
     
     elapsed = time.time() - start_time
     print(f"\n   Tempo decorrido: {elapsed:.2f} segundos")
-    print(f"   Dados coletados: {len(mathematicians_data)} registros")
+    print(f"   Dados coletados: {record_count} registros")
     
-    # 3. Análise: Quais matemáticos orientaram mais alunos no Brasil?
-    print("\n[3/6] Analisando orientadores com mais alunos...")
-    advisor_count = Counter()
+    # Uma única passada pelos registros alimenta todas as análises (3 a 6)
+    # e a exportação, assim o cache pode ser lido em streaming
+    advisor_ids = []
     advisor_names = {}
+    schools = []
+    max_descendants = 0
+    top_mathematician = None
+    edges = []
+    no_advisees = []
+    # Colunas da exportação, preenchidas durante a passada (dict de listas)
+    df_columns = {'ID': [], 'Nome': [], 'Descendentes': [], 'Orientandos_Diretos': []}
     
     for data in mathematicians_data:
-        advisors = extract_advisor_info(data)
-        for advisor_id, advisor_name in advisors:
-            advisor_count[advisor_id] += 1
-            advisor_names[advisor_id] = advisor_name
+        academic = data.get('MGP_academic')
+        if academic is None:
+            continue
+        
+        student_id = academic.get('ID')
+        student_data = academic.get('student_data') or {}
+        descendants = student_data.get('descendants') or {}
+        descendant_count = descendants.get('descendant_count', 0)
+        advisees = descendants.get('advisees', {})
+        
+        first_advisor = len(advisor_ids)
+        accumulate_advisors(student_data, advisor_ids, advisor_names)
+        # Adicionar arestas (orientador -> orientando) para os orientadores
+        # acumulados deste registro
+        edges.extend((advisor_id, student_id) for advisor_id in advisor_ids[first_advisor:])
+        accumulate_schools(student_data, schools)
+        
+        if descendant_count > max_descendants:
+            max_descendants = descendant_count
+            top_mathematician = academic
+        
+        # Doutores sem orientandos (mas podem ter orientador)
+        if not advisees or advisees == [""]:
+            no_advisees.append(student_id)
+        
+        df_columns['ID'].append(student_id)
+        df_columns['Nome'].append(f"{academic.get('given_name', '')} {academic.get('family_name', '')}")
+        df_columns['Descendentes'].append(descendant_count)
+        df_columns['Orientandos_Diretos'].append(len(advisees))
     
+    # Construir grafo de uma vez a partir das arestas coletadas
+    G = nx.DiGraph()
+    G.add_edges_from(edges)
+    
+    # 3. Análise: Quais matemáticos orientaram mais alunos no Brasil?
+    print("\n[3/6] Analisando orientadores com mais alunos...")
     print("\n   TOP 10 ORIENTADORES COM MAIS ALUNOS NO BRASIL:")
     print("   " + "-" * 70)
+    advisor_count = Counter(advisor_ids)
     for advisor_id, count in advisor_count.most_common(10):
         print(f"   {advisor_names.get(advisor_id, 'Nome desconhecido'):40s} - {count:3d} alunos")
     
     # 4. Análise: Quais universidades brasileiras formaram mais doutores?
     print("\n[4/6] Analisando universidades que mais formaram doutores...")
-    school_count = Counter()
-    
-    for data in mathematicians_data:
-        schools = extract_school_info(data)
-        for school in schools:
-            # Filtrar apenas escolas brasileiras
-            if "Brazil" in school or "Brasil" in school:
-                school_count[school] += 1
-    
     print("\n   TOP 10 UNIVERSIDADES BRASILEIRAS:")
     print("   " + "-" * 70)
+    # Filtrar apenas escolas brasileiras
+    school_count = Counter(filter(BRAZIL_SEARCH, schools))
     for school, count in school_count.most_common(10):
         print(f"   {school:50s} - {count:3d} doutores")
     
     # 5. Análise: Matemático formado no Brasil com mais descendentes
     print("\n[5/6] Analisando matemáticos com mais descendentes...")
-    max_descendants = 0
-    top_mathematician = None
-    
-    for data in mathematicians_data:
-        if 'MGP_academic' in data:
-            academic = data['MGP_academic']
-            student_data = academic.get('student_data', {})
-            descendants = student_data.get('descendants', {})
-            descendant_count = descendants.get('descendant_count', 0)
-            
-            if descendant_count > max_descendants:
-                max_descendants = descendant_count
-                top_mathematician = academic
-    
     if top_mathematician:
         name = f"{top_mathematician.get('given_name', '')} {top_mathematician.get('family_name', '')}"
         print(f"\n   Matemático com mais descendentes: {name}")
@@ -240,86 +500,52 @@ def main():
     # 6. Análise do grafo: vértices isolados e componente conexo
     print("\n[6/6] Analisando estrutura do grafo...")
     
-    # Construir grafo
-    G = nx.DiGraph()
-    
-    for data in mathematicians_data:
-        if 'MGP_academic' in data:
-            academic = data['MGP_academic']
-            student_id = academic.get('ID')
-            
-            # Adicionar arestas (orientador -> orientando)
-            advisors = extract_advisor_info(data)
-            for advisor_id, _ in advisors:
-                G.add_edge(advisor_id, student_id)
-    
-    # Converter para grafo não-direcionado para análise de componentes
-    G_undirected = G.to_undirected()
+    num_nodes = G.number_of_nodes()
     
     # Vértices isolados (sem orientador e sem orientandos)
-    isolated_nodes = list(nx.isolates(G_undirected))
+    isolated_nodes = [n for n, degree in G.degree if degree == 0]
     print(f"\n   Doutores que não orientaram ninguém e não têm orientador registrado: {len(isolated_nodes)}")
-    
-    # Doutores sem orientandos (mas podem ter orientador)
-    no_advisees = []
-    for data in mathematicians_data:
-        if 'MGP_academic' in data:
-            academic = data['MGP_academic']
-            student_id = academic.get('ID')
-            student_data = academic.get('student_data', {})
-            descendants = student_data.get('descendants', {})
-            advisees = descendants.get('advisees', {})
-            
-            if not advisees or (isinstance(advisees, list) and len(advisees) == 1 and advisees[0] == ""):
-                no_advisees.append(student_id)
-    
     print(f"   Doutores que não orientaram ninguém: {len(no_advisees)}")
     
     # Componentes conexos
-    if len(G_undirected) > 0:
-        components = list(nx.connected_components(G_undirected))
-        components_sorted = sorted(components, key=len, reverse=True)
+    if num_nodes > 0:
+        # Componentes fracamente conexos do grafo dirigido correspondem aos
+        # componentes conexos da versão não-direcionada. Só os tamanhos são
+        # usados, então cada conjunto de vértices é descartado após ser medido
+        component_sizes = [len(comp) for comp in nx.weakly_connected_components(G)]
+        top_sizes = heapq.nlargest(5, component_sizes)
         
-        print(f"\n   Número de componentes conexos: {len(components)}")
+        print(f"\n   Número de componentes conexos: {len(component_sizes)}")
         
-        if components_sorted:
-            largest_component = components_sorted[0]
-            print(f"   Tamanho do maior componente: {len(largest_component)} vértices")
-            print(f"   Percentual do grafo: {100 * len(largest_component) / len(G_undirected):.2f}%")
+        if top_sizes:
+            largest_size = top_sizes[0]
+            print(f"   Tamanho do maior componente: {largest_size} vértices")
+            print(f"   Percentual do grafo: {100 * largest_size / num_nodes:.2f}%")
             
             # componente gigante se > 50% dos vértices
-            if len(largest_component) / len(G_undirected) > 0.5:
+            if largest_size / num_nodes > 0.5:
                 print("   SIM, é um componente gigante (> 50% dos vértices)")
             else:
                 print("   NÃO é um componente gigante (< 50% dos vértices)")
             
             # distribuição dos top 5 componentes
             print("\n   TOP 5 MAIORES COMPONENTES:")
-            for i, comp in enumerate(components_sorted[:5], 1):
-                print(f"   {i}. {len(comp)} vértices ({100 * len(comp) / len(G_undirected):.2f}%)")
+            for i, size in enumerate(top_sizes, 1):
+                print(f"   {i}. {size} vértices ({100 * size / num_nodes:.2f}%)")
     else:
         print("\n   Grafo vazio - nenhum vértice encontrado")
     
     print("\n[SALVANDO] Exportando resultados...")
     
-    df_data = []
-    for data in mathematicians_data:
-        if 'MGP_academic' in data:
-            academic = data['MGP_academic']
-            student_data = academic.get('student_data', {})
-            descendants = student_data.get('descendants', {})
-            
-            df_data.append({
-                'ID': academic.get('ID'),
-                'Nome': f"{academic.get('given_name', '')} {academic.get('family_name', '')}",
-                'Descendentes': descendants.get('descendant_count', 0),
-                'Orientandos_Diretos': len(descendants.get('advisees', {}))
-            })
-    
-    df = pd.DataFrame(df_data)
-    df.to_csv('matematicos_brasil.csv', index=False)
+    df = pd.DataFrame(df_columns)
+    df.to_csv('matematicos_brasil.csv', index=False, lineterminator='\n')
     print("   Salvo: matematicos_brasil.csv")
     
+    if pyarrow:
+        # Parquet (colunar, zstd) é menor e muito mais rápido de reler no pandas
+        df.to_parquet('matematicos_brasil.parquet', index=False, compression='zstd')
+        print("   Salvo: matematicos_brasil.parquet")
+    
     total_time = time.time() - start_time
     print("\n" + "=" * 80)
     print(f"ANÁLISE CONCLUÍDA EM {total_time:.2f} SEGUNDOS!")